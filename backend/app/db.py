@@ -4,24 +4,91 @@ SQLite for development, can be switched to PostgreSQL
 """
 
 import os
-import sqlite3
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
+from sqlalchemy import create_engine, event, make_url, Column, Integer, String, DateTime, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, NullPool
 from datetime import datetime
 
 # Database setup
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database/talash.db")
 
-# Ensure database directory exists
-os.makedirs("database", exist_ok=True)
+# Ensure the SQLite database directory exists (once, at import)
+if "sqlite" in DATABASE_URL:
+    _db_dir = os.path.dirname(make_url(DATABASE_URL).database or "")
+    if _db_dir:
+        os.makedirs(_db_dir, exist_ok=True)
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Connection pool configuration
+# Connections are kept open and reused across requests instead of being
+# reopened for every session. LIFO checkout reuses the most recently used
+# connection, so a small hot set keeps its page cache warm and idle extras
+# can time out.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Set when an external pooler (e.g. PgBouncer in transaction mode) sits in
+# front of the database, so connections are not pooled twice
+USE_EXTERNAL_POOL = os.getenv("DB_EXTERNAL_POOL", "").lower() in ("1", "true", "yes")
+
+# Size of the engine's compiled statement cache (hot SELECTs compile once)
+QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+
+if "sqlite" in DATABASE_URL:
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=QueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_use_lifo=True,
+        query_cache_size=QUERY_CACHE_SIZE,
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+elif USE_EXTERNAL_POOL:
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        query_cache_size=QUERY_CACHE_SIZE
+    )
+else:
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=QueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_use_lifo=True,
+        pool_pre_ping=True,
+        pool_recycle=POOL_RECYCLE,
+        query_cache_size=QUERY_CACHE_SIZE
+    )
+
+# SQLite PRAGMAs: WAL allows concurrent readers alongside a single writer
+if "sqlite" in DATABASE_URL:
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Enable WAL and tune SQLite on every new pooled connection"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# expire_on_commit=False keeps loaded attributes usable after commit, so
+# building a response does not trigger a refresh SELECT per instance
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine
+)
 Base = declarative_base()
 
 
@@ -36,62 +103,11 @@ def get_db():
 
 def init_db():
     """Initialize database tables"""
-    # Create all tables
+    # Create all tables (idempotent: existing tables are left untouched)
     Base.metadata.create_all(bind=engine)
     
-    # Initialize SQLite with schema if using SQLite
-    if "sqlite" in DATABASE_URL:
-        init_sqlite_schema()
-
-
-def init_sqlite_schema():
-    """Initialize SQLite database schema"""
-    db_path = "database/talash.db"
-    os.makedirs("database", exist_ok=True)
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        email TEXT UNIQUE NOT NULL,
-        role TEXT DEFAULT 'user',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    
-    # Create found_items table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS found_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        description TEXT NOT NULL,
-        location TEXT NOT NULL,
-        date_found TIMESTAMP NOT NULL,
-        image_url TEXT,
-        status TEXT DEFAULT 'pending',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    """)
-    
-    # Create lost_items table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS lost_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        description TEXT NOT NULL,
-        location TEXT NOT NULL,
-        date_lost TIMESTAMP NOT NULL,
-        image_url TEXT,
-        status TEXT DEFAULT 'pending',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    """)
-    
-    conn.commit()
-    conn.close()
+    # create_all skips indexes on tables that already exist, so add any
+    # indexes introduced after the database was first created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -3,17 +3,44 @@ Item data model for Talash
 Handles found and lost item storage and retrieval
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, insert, func, select, bindparam, literal, union_all
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session, relationship
 from app.db import Base
+from app.utils.cache import TTLCache
+from app.utils.shared_cache import shared_get, shared_set, shared_incr, shared_counter
+import orjson
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Dict, Any
+
+
+# Short-lived cache of list totals, keyed by (table, status filter, shared version)
+ITEM_COUNT_TTL_SECONDS = 5
+_item_counts = TTLCache(maxsize=16, ttl=ITEM_COUNT_TTL_SECONDS)
+
+# Found item details by ID; admin writes drop the affected IDs here, and the
+# TTL bounds how long other workers can serve a stale status
+ITEM_DETAIL_TTL_SECONDS = 30
+_found_item_details = TTLCache(maxsize=2048, ttl=ITEM_DETAIL_TTL_SECONDS)
+
+# When REDIS_URL is set, every item write increments a shared version. It
+# keys the cached counts (locally and in Redis), so counts read before a
+# write are never served after it, and it is the version used for ETags.
+SHARED_ITEMS_VERSION_KEY = "items:version"
+SHARED_COUNTS_KEY = "items:found:status_counts:v1"
+SHARED_COUNTS_TTL_SECONDS = 60
 
 
 class FoundItemDB(Base):
     """SQLAlchemy Found Item model"""
     __tablename__ = "found_items"
+    # (status, id) serves every status filter, the per-status counts and
+    # keyset pages ordered by id, so status needs no index of its own
+    __table_args__ = (
+        Index("ix_found_user_status", "user_id", "status"),
+        Index("ix_found_status_id", "status", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -22,12 +49,20 @@ class FoundItemDB(Base):
     date_found = Column(DateTime, nullable=False)
     image_url = Column(String, nullable=True)
     status = Column(String, default="pending")  # pending, approved, claimed
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # The Python default covers tables created before the server default existed
+    # (create_all never alters existing tables)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp(), nullable=False)
 
 
 class LostItemDB(Base):
     """SQLAlchemy Lost Item model"""
     __tablename__ = "lost_items"
+    # (status, id) serves every status filter, the per-status counts and
+    # keyset pages ordered by id, so status needs no index of its own
+    __table_args__ = (
+        Index("ix_lost_user_status", "user_id", "status"),
+        Index("ix_lost_status_id", "status", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -36,23 +71,67 @@ class LostItemDB(Base):
     date_lost = Column(DateTime, nullable=False)
     image_url = Column(String, nullable=True)
     status = Column(String, default="pending")  # pending, approved, found
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp(), nullable=False)
+
+
+# Column projections for list endpoints (rows instead of full ORM objects)
+FOUND_ITEM_COLUMNS = (
+    FoundItemDB.id,
+    FoundItemDB.user_id,
+    FoundItemDB.description,
+    FoundItemDB.location,
+    FoundItemDB.date_found,
+    FoundItemDB.image_url,
+    FoundItemDB.status,
+    FoundItemDB.created_at,
+)
+
+LOST_ITEM_COLUMNS = (
+    LostItemDB.id,
+    LostItemDB.user_id,
+    LostItemDB.description,
+    LostItemDB.location,
+    LostItemDB.date_lost,
+    LostItemDB.image_url,
+    LostItemDB.status,
+    LostItemDB.created_at,
+)
+
+
+# Module-level statements so their compiled SQL is reused from the engine cache
+_select_found_item_row_by_id = (
+    select(*FOUND_ITEM_COLUMNS).where(FoundItemDB.id == bindparam("item_id")).limit(1)
+)
+_select_found_items_by_user = select(*FOUND_ITEM_COLUMNS).where(FoundItemDB.user_id == bindparam("user_id"))
+_select_found_item_rows = select(*FOUND_ITEM_COLUMNS).order_by(FoundItemDB.id.desc())
+_select_lost_item_rows = select(*LOST_ITEM_COLUMNS).order_by(LostItemDB.id.desc())
+_count_lost_items = select(func.count()).select_from(LostItemDB)
+_count_found_items_by_status = select(FoundItemDB.status, func.count()).group_by(FoundItemDB.status)
+# Per-status row count and highest ID of both tables; any insert, delete or
+# status change alters it (index-only on the (status, id) indexes)
+_select_items_signature = union_all(
+    select(literal("found"), FoundItemDB.status, func.count(), func.max(FoundItemDB.id))
+    .group_by(FoundItemDB.status),
+    select(literal("lost"), LostItemDB.status, func.count(), func.max(LostItemDB.id))
+    .group_by(LostItemDB.status)
+)
 
 
 class FoundItemRequest(BaseModel):
     """Pydantic model for found item creation"""
     description: str
     location: str
-    date_found: str  # ISO format: "2024-01-15T14:30:00"
+    date_found: datetime  # ISO format, parsed natively by pydantic-core: "2024-01-15T14:30:00"
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "description": "Blue backpack with laptop",
                 "location": "Main Library",
                 "date_found": "2024-01-15T14:30:00"
             }
         }
+    )
 
 
 class FoundItemResponse(BaseModel):
@@ -66,33 +145,33 @@ class FoundItemResponse(BaseModel):
     status: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class FoundItemListResponse(BaseModel):
     """Pydantic model for found items list"""
     items: List[FoundItemResponse]
-    total: int
+    total: Optional[int]  # None when requested with include_total=false
+    next_cursor: Optional[int] = None  # Pass as ?cursor= to fetch the next page
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class LostItemRequest(BaseModel):
     """Pydantic model for lost item creation"""
     description: str
     location: str
-    date_lost: str  # ISO format: "2024-01-15T14:30:00"
+    date_lost: datetime  # ISO format, parsed natively by pydantic-core: "2024-01-15T14:30:00"
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "description": "Red wallet with student ID",
                 "location": "Cafeteria",
                 "date_lost": "2024-01-14T12:00:00"
             }
         }
+    )
 
 
 class LostItemResponse(BaseModel):
@@ -106,8 +185,81 @@ class LostItemResponse(BaseModel):
     status: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LostItemListResponse(BaseModel):
+    """Pydantic model for lost items list"""
+    items: List[LostItemResponse]
+    total: Optional[int]  # None when requested with include_total=false
+    next_cursor: Optional[int] = None  # Pass as ?cursor= to fetch the next page
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BulkItemIdsRequest(BaseModel):
+    """Pydantic model for bulk moderation of items"""
+    ids: List[int] = Field(..., min_length=1, max_length=500)
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "ids": [12, 15, 21]
+            }
+        }
+    )
+
+
+def found_item_to_dict(db_item: FoundItemDB) -> Dict[str, Any]:
+    """
+    Convert a found item to a plain dict for direct JSON encoding
+    
+    Args:
+        db_item: Found item object or FOUND_ITEM_COLUMNS row
+        
+    Returns:
+        Dict with the same fields as FoundItemResponse
+    """
+    # Projected rows already carry exactly these fields, in order
+    if isinstance(db_item, Row):
+        return db_item._asdict()
+    
+    return {
+        "id": db_item.id,
+        "user_id": db_item.user_id,
+        "description": db_item.description,
+        "location": db_item.location,
+        "date_found": db_item.date_found,
+        "image_url": db_item.image_url,
+        "status": db_item.status,
+        "created_at": db_item.created_at
+    }
+
+
+def lost_item_to_dict(db_item: LostItemDB) -> Dict[str, Any]:
+    """
+    Convert a lost item to a plain dict for direct JSON encoding
+    
+    Args:
+        db_item: Lost item object or LOST_ITEM_COLUMNS row
+        
+    Returns:
+        Dict with the same fields as LostItemResponse
+    """
+    # Projected rows already carry exactly these fields, in order
+    if isinstance(db_item, Row):
+        return db_item._asdict()
+    
+    return {
+        "id": db_item.id,
+        "user_id": db_item.user_id,
+        "description": db_item.description,
+        "location": db_item.location,
+        "date_lost": db_item.date_lost,
+        "image_url": db_item.image_url,
+        "status": db_item.status,
+        "created_at": db_item.created_at
+    }
 
 
 def create_found_item(
@@ -132,49 +284,98 @@ def create_found_item(
     Returns:
         Created found item object
     """
-    db_item = FoundItemDB(
-        user_id=user_id,
-        description=description,
-        location=location,
-        date_found=date_found,
-        image_url=image_url
+    # INSERT ... RETURNING loads the generated id and created_at without a refresh SELECT
+    db_item = db.scalar(
+        insert(FoundItemDB).values(
+            user_id=user_id,
+            description=description,
+            location=location,
+            date_found=date_found,
+            image_url=image_url
+        ).returning(FoundItemDB)
     )
-    db.add(db_item)
     db.commit()
-    db.refresh(db_item)
+    invalidate_item_counts()
     return db_item
 
 
-def get_found_items(db: Session, skip: int = 0, limit: int = 10) -> List[FoundItemDB]:
+def get_found_items(
+    db: Session,
+    cursor: Optional[int] = None,
+    limit: int = 10,
+    status_filter: str = "all",
+    skip: int = 0
+) -> List:
     """
-    Get paginated list of found items
+    Get keyset-paginated list of found items, newest first
     
     Args:
         db: Database session
-        skip: Number of items to skip
+        cursor: ID of the last item from the previous page (None for first page)
         limit: Number of items to return
+        status_filter: Status to list, or "all"
+        skip: Number of items to skip after the cursor (offset pagination)
         
     Returns:
-        List of found items
+        List of FOUND_ITEM_COLUMNS rows; the last row's ID is the cursor for the next page
     """
-    return db.query(FoundItemDB).offset(skip).limit(limit).all()
+    stmt = _select_found_item_rows
+    if status_filter != "all":
+        stmt = stmt.where(FoundItemDB.status == status_filter)
+    if cursor is not None:
+        stmt = stmt.where(FoundItemDB.id < cursor)
+    return db.execute(stmt.offset(skip).limit(limit)).all()
 
 
-def get_found_item_by_id(db: Session, item_id: int) -> Optional[FoundItemDB]:
+def get_found_item_row(db: Session, item_id: int):
     """
-    Get found item by ID
+    Get a found item as a plain column row, skipping ORM instance setup
+    
+    Use for read-only lookups; moderation updates rows with UPDATE/DELETE ... RETURNING.
     
     Args:
         db: Database session
         item_id: Item ID
         
     Returns:
-        Found item object or None if not found
+        FOUND_ITEM_COLUMNS row or None if not found
     """
-    return db.query(FoundItemDB).filter(FoundItemDB.id == item_id).first()
+    return db.execute(_select_found_item_row_by_id, {"item_id": item_id}).one_or_none()
 
 
-def get_found_items_by_user(db: Session, user_id: int) -> List[FoundItemDB]:
+def get_found_item_detail(db: Session, item_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get a found item's response dict, cached briefly for popular items
+    
+    Args:
+        db: Database session
+        item_id: Item ID
+        
+    Returns:
+        Found item dict or None if not found (misses are not cached)
+    """
+    item = _found_item_details.get(item_id)
+    if item is None:
+        row = get_found_item_row(db, item_id)
+        if row is None:
+            return None
+        item = found_item_to_dict(row)
+        _found_item_details.set(item_id, item)
+    return item
+
+
+def invalidate_found_item_details(item_ids: List[int]) -> None:
+    """
+    Drop cached found item details after those items are updated or deleted
+    
+    Args:
+        item_ids: IDs of the changed items
+    """
+    for item_id in item_ids:
+        _found_item_details.pop(item_id)
+
+
+def get_found_items_by_user(db: Session, user_id: int) -> List:
     """
     Get all found items reported by a user
     
@@ -183,9 +384,9 @@ def get_found_items_by_user(db: Session, user_id: int) -> List[FoundItemDB]:
         user_id: User ID
         
     Returns:
-        List of user's found items
+        List of FOUND_ITEM_COLUMNS rows for the user's found items
     """
-    return db.query(FoundItemDB).filter(FoundItemDB.user_id == user_id).all()
+    return db.execute(_select_found_items_by_user, {"user_id": user_id}).all()
 
 
 def create_lost_item(
@@ -210,29 +411,148 @@ def create_lost_item(
     Returns:
         Created lost item object
     """
-    db_item = LostItemDB(
-        user_id=user_id,
-        description=description,
-        location=location,
-        date_lost=date_lost,
-        image_url=image_url
+    # INSERT ... RETURNING loads the generated id and created_at without a refresh SELECT
+    db_item = db.scalar(
+        insert(LostItemDB).values(
+            user_id=user_id,
+            description=description,
+            location=location,
+            date_lost=date_lost,
+            image_url=image_url
+        ).returning(LostItemDB)
     )
-    db.add(db_item)
     db.commit()
-    db.refresh(db_item)
+    invalidate_item_counts()
     return db_item
 
 
-def get_lost_items(db: Session, skip: int = 0, limit: int = 10) -> List[LostItemDB]:
+def get_lost_items(
+    db: Session,
+    cursor: Optional[int] = None,
+    limit: int = 10,
+    status_filter: str = "all",
+    skip: int = 0
+) -> List:
     """
-    Get paginated list of lost items
+    Get keyset-paginated list of lost items, newest first
     
     Args:
         db: Database session
-        skip: Number of items to skip
+        cursor: ID of the last item from the previous page (None for first page)
         limit: Number of items to return
+        status_filter: Status to list, or "all"
+        skip: Number of items to skip after the cursor (offset pagination)
+        
+    Returns:
+        List of LOST_ITEM_COLUMNS rows; the last row's ID is the cursor for the next page
+    """
+    stmt = _select_lost_item_rows
+    if status_filter != "all":
+        stmt = stmt.where(LostItemDB.status == status_filter)
+    if cursor is not None:
+        stmt = stmt.where(LostItemDB.id < cursor)
+    return db.execute(stmt.offset(skip).limit(limit)).all()
+
+
+def invalidate_item_counts() -> None:
+    """Drop cached list totals after items are created, updated, or deleted"""
+    _item_counts.clear()
+    shared_incr(SHARED_ITEMS_VERSION_KEY)
+
+
+def get_items_version(db: Session) -> str:
+    """
+    Get a token that changes whenever item data changes, identical on all workers
+    
+    Uses the shared write counter when REDIS_URL is set; otherwise a
+    signature of per-status row counts and highest IDs read from the database.
+    
+    Args:
+        db: Database session
         
     Returns:
-        List of lost items
+        Version string suitable for building an ETag
     """
-    return db.query(LostItemDB).offset(skip).limit(limit).all()
+    version = shared_counter(SHARED_ITEMS_VERSION_KEY)
+    if version is not None:
+        return f"v{version}"
+    
+    rows = db.execute(_select_items_signature).all()
+    return repr(sorted(map(tuple, rows), key=repr))
+
+
+def count_found_items(db: Session, status_filter: str = "all") -> int:
+    """
+    Count found items, cached for a few seconds
+    
+    Derived from count_found_items_by_status, so the list, pending and
+    dashboard totals share one grouped query.
+    
+    Args:
+        db: Database session
+        status_filter: Status to count, or "all"
+        
+    Returns:
+        Number of matching found items
+    """
+    counts = count_found_items_by_status(db)
+    if status_filter == "all":
+        return sum(counts.values())
+    return counts.get(status_filter, 0)
+
+
+def count_lost_items(db: Session, status_filter: str = "all") -> int:
+    """
+    Count lost items, cached for a few seconds
+    
+    Args:
+        db: Database session
+        status_filter: Status to count, or "all"
+        
+    Returns:
+        Number of matching lost items
+    """
+    key = ("lost", status_filter, shared_counter(SHARED_ITEMS_VERSION_KEY))
+    total = _item_counts.get(key)
+    if total is None:
+        stmt = _count_lost_items
+        if status_filter != "all":
+            stmt = stmt.where(LostItemDB.status == status_filter)
+        total = db.scalar(stmt)
+        _item_counts.set(key, total)
+    return total
+
+
+def count_found_items_by_status(db: Session) -> Dict[str, int]:
+    """
+    Count found items per status in a single grouped query
+    Cached in-process for a few seconds; with REDIS_URL set, both caches are
+    keyed by the shared version, so a write on any worker takes effect at once
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Dict mapping status to item count (statuses with no items are absent)
+    """
+    # Read the version before the counts: if a write lands while we query,
+    # our result is stored under the old version and never served
+    version = shared_counter(SHARED_ITEMS_VERSION_KEY)
+    key = ("found", "by_status", version)
+    counts = _item_counts.get(key)
+    if counts is not None:
+        return counts
+    
+    if version is None:
+        counts = dict(db.execute(_count_found_items_by_status).all())
+    else:
+        shared_key = f"{SHARED_COUNTS_KEY}:{version}"
+        raw = shared_get(shared_key)
+        if raw is not None:
+            counts = orjson.loads(raw)
+        else:
+            counts = dict(db.execute(_count_found_items_by_status).all())
+            shared_set(shared_key, orjson.dumps(counts), SHARED_COUNTS_TTL_SECONDS)
+    
+    _item_counts.set(key, counts)
+    return counts
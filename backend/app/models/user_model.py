@@ -3,12 +3,14 @@ User data model for Talash
 Handles user information storage and retrieval
 """
 
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, insert, select, bindparam, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.db import Base
+from app.utils.cache import TTLCache
 from datetime import datetime
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import Optional, NamedTuple, Union
 
 
 class UserDB(Base):
@@ -19,21 +21,44 @@ class UserDB(Base):
     name = Column(String, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     role = Column(String, default="user", nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Also set in Python: users tables from older releases have no DB default
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp(), nullable=False)
+
+
+class UserSnapshot(NamedTuple):
+    """Detached, read-only copy of a user row safe to share across sessions"""
+    id: int
+    name: str
+    email: str
+    role: str
+    created_at: datetime
+
+
+# Cache of user lookups keyed by ("email", email) and ("id", user_id)
+USER_CACHE_TTL_SECONDS = 300
+_user_cache = TTLCache(maxsize=1024, ttl=USER_CACHE_TTL_SECONDS)
+
+
+# Module-level statements so their compiled SQL is reused from the engine cache
+# Lookups select plain columns so no ORM instance is built for a snapshot
+_USER_COLUMNS = (UserDB.id, UserDB.name, UserDB.email, UserDB.role, UserDB.created_at)
+_select_user_by_email = select(*_USER_COLUMNS).where(UserDB.email == bindparam("email")).limit(1)
+_select_user_by_id = select(*_USER_COLUMNS).where(UserDB.id == bindparam("user_id")).limit(1)
 
 
 class UserSignupRequest(BaseModel):
     """Pydantic model for user signup"""
     name: str
-    email: str
+    email: EmailStr  # Validated once at the API boundary
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "name": "John Doe",
                 "email": "john@iba.edu.pk"
             }
         }
+    )
 
 
 class UserResponse(BaseModel):
@@ -44,24 +69,44 @@ class UserResponse(BaseModel):
     role: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    # Plain str email: no email validation runs on the read path
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AdminSignupRequest(BaseModel):
     """Pydantic model for admin signup"""
     name: str
-    email: str
+    email: EmailStr  # Validated once at the API boundary
     admin_key: str  # Simple validation key for admin registration
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "name": "Admin User",
                 "email": "admin@iba.edu.pk",
                 "admin_key": "secret_admin_key"
             }
         }
+    )
+
+
+def to_user_response(db_user: Union[UserDB, UserSnapshot]) -> UserResponse:
+    """
+    Build a user response without re-validating ORM data
+    
+    Args:
+        db_user: User object or cached snapshot
+        
+    Returns:
+        User response model
+    """
+    return UserResponse.model_construct(
+        id=db_user.id,
+        name=db_user.name,
+        email=db_user.email,
+        role=db_user.role,
+        created_at=db_user.created_at
+    )
 
 
 def create_user(db: Session, name: str, email: str, role: str = "user") -> UserDB:
@@ -77,50 +122,89 @@ def create_user(db: Session, name: str, email: str, role: str = "user") -> UserD
     Returns:
         Created user object
     """
-    db_user = UserDB(name=name, email=email, role=role)
-    db.add(db_user)
+    # INSERT ... RETURNING loads the generated id and created_at without a refresh SELECT
+    db_user = db.scalar(
+        insert(UserDB).values(name=name, email=email, role=role).returning(UserDB)
+    )
     db.commit()
-    db.refresh(db_user)
+    
+    # Warm the lookup cache; the new user's next request is usually authenticated
+    _cache_user(UserSnapshot(db_user.id, db_user.name, db_user.email, db_user.role, db_user.created_at))
     return db_user
 
 
-def get_user_by_email(db: Session, email: str) -> Optional[UserDB]:
+def create_user_if_absent(db: Session, name: str, email: str, role: str = "user") -> Optional[UserDB]:
     """
-    Get user by email
+    Create a new user unless the email is already registered
+    
+    The unique index on email does the existence check, so signup is a
+    single INSERT and two concurrent signups for one email cannot both succeed.
     
     Args:
         db: Database session
+        name: User's name
         email: User's email
+        role: User's role (default: "user")
         
     Returns:
-        User object or None if not found
+        Created user object, or None if the email is already taken
     """
-    return db.query(UserDB).filter(UserDB.email == email).first()
+    try:
+        return create_user(db, name, email, role)
+    except IntegrityError:
+        db.rollback()
+        return None
+
 
+def _cache_user(user: UserSnapshot) -> None:
+    """Store a snapshot under both its email and ID keys"""
+    _user_cache.set(("email", user.email), user)
+    _user_cache.set(("id", user.id), user)
 
-def get_user_by_id(db: Session, user_id: int) -> Optional[UserDB]:
+
+def get_user_by_email(db: Session, email: str, use_cache: bool = True) -> Optional[UserSnapshot]:
     """
-    Get user by ID
+    Get user by email, served from an in-process cache when possible
     
     Args:
         db: Database session
-        user_id: User's ID
+        email: User's email
+        use_cache: Set to False to read the row (and role) from the database;
+                   the cache is refreshed with the result
         
     Returns:
-        User object or None if not found
+        User snapshot or None if not found
     """
-    return db.query(UserDB).filter(UserDB.id == user_id).first()
-
-
-def user_exists(db: Session, email: str) -> bool:
+    user = _user_cache.get(("email", email)) if use_cache else None
+    if user is None:
+        row = db.execute(_select_user_by_email, {"email": email}).one_or_none()
+        if row is not None:
+            user = UserSnapshot(*row)
+            _cache_user(user)
+        elif not use_cache:
+            # Deleted user: drop the stale snapshot from every lookup
+            stale = _user_cache.pop(("email", email))
+            if stale is not None:
+                _user_cache.pop(("id", stale.id))
+    return user
+
+
+def get_user_by_id(db: Session, user_id: int) -> Optional[UserSnapshot]:
     """
-    Check if user exists by email
+    Get user by ID, served from an in-process cache when possible
     
     Args:
         db: Database session
-        email: User's email
+        user_id: User's ID
         
     Returns:
-        True if user exists, False otherwise
+        User snapshot or None if not found
     """
-    return db.query(UserDB).filter(UserDB.email == email).first() is not None
+    user = _user_cache.get(("id", user_id))
+    if user is None:
+        row = db.execute(_select_user_by_id, {"user_id": user_id}).one_or_none()
+        if row is not None:
+            user = UserSnapshot(*row)
+            _cache_user(user)
+    return user
+
@@ -4,35 +4,43 @@ Handles admin signup, login, and item moderation
 """
 
 import os
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+import hmac
+from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import update, delete
 from sqlalchemy.orm import Session
 from app.db import get_db
 from app.models.user_model import (
     AdminSignupRequest,
     UserResponse,
-    create_user,
-    get_user_by_email,
-    user_exists
+    UserSnapshot,
+    to_user_response,
+    create_user_if_absent,
+    get_user_by_email
 )
 from app.utils.validators import validate_iba_email
-from app.utils.firebase_verify import (
-    extract_token_from_header,
-    get_user_from_token,
-    initialize_firebase
-)
+from app.utils.firebase_verify import get_user_from_token
+from app.utils.dependencies import require_admin
+from app.utils.etag import make_etag, not_modified_response
 from app.models.item_model import (
     get_found_items,
-    get_found_item_by_id,
+    count_found_items,
+    count_found_items_by_status,
+    invalidate_item_counts,
+    invalidate_found_item_details,
+    found_item_to_dict,
+    BulkItemIdsRequest,
+    FoundItemDB,
+    FOUND_ITEM_COLUMNS,
     FoundItemResponse
 )
-from sqlalchemy.orm import Session
 
 router = APIRouter()
 
 # Simple admin key for registration (should be environment variable in production)
 ADMIN_KEY = os.getenv("ADMIN_KEY", "admin_secret_2024")
-
-initialize_firebase()
+_ADMIN_KEY_BYTES = ADMIN_KEY.encode()
 
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -58,8 +66,8 @@ def admin_signup(
         HTTPException: If admin key is invalid, email is invalid, or user exists
     """
     
-    # Validate admin key
-    if request.admin_key != ADMIN_KEY:
+    # Validate admin key (constant-time so response timing does not leak it)
+    if not hmac.compare_digest(request.admin_key.encode(), _ADMIN_KEY_BYTES):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid admin registration key"
@@ -72,22 +80,20 @@ def admin_signup(
             detail="Only @iba.edu.pk email addresses are allowed"
         )
     
-    # Check if user already exists
-    if user_exists(db, request.email):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User with this email already exists"
-        )
-    
-    # Create admin user with "admin" role
-    db_user = create_user(
+    # Create admin user with "admin" role; the unique email index rejects existing users
+    db_user = create_user_if_absent(
         db=db,
         name=request.name,
         email=request.email,
         role="admin"
     )
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists"
+        )
     
-    return db_user
+    return to_user_response(db_user)
 
 
 @router.post("/login")
@@ -122,16 +128,17 @@ def admin_login(
             detail="Invalid email domain"
         )
     
-    # Verify Firebase token
+    # Verify Firebase token, which must belong to the email logging in
+    # (Firebase lowercases the email claim; users may type it in any case)
     user_data = get_user_from_token(token)
-    if not user_data:
+    if not user_data or (user_data.get("email") or "").casefold() != email.casefold():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
     
-    # Get user from database
-    db_user = get_user_by_email(db, email)
+    # Get user from database (uncached, since the role is checked below)
+    db_user = get_user_by_email(db, email, use_cache=False)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -160,7 +167,8 @@ def admin_login(
 
 @router.get("/dashboard")
 def admin_dashboard(
-    authorization: str,
+    request: Request,
+    db_user: UserSnapshot = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -169,43 +177,30 @@ def admin_dashboard(
     
     Headers:
         authorization: "Bearer <token>"
+        if-none-match: ETag from a previous response (optional)
     
     Returns:
-        Dashboard statistics and pending items
+        Dashboard statistics and pending items, or 304 if unchanged
         
     Raises:
         HTTPException: If token invalid or user not admin
     """
     
-    # Extract and verify token
-    token = extract_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user_data = get_user_from_token(token)
-    if not user_data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
+    # Get statistics (one grouped query instead of a COUNT per status)
+    counts = count_found_items_by_status(db)
     
-    # Get user and verify admin
-    db_user = get_user_by_email(db, user_data.get("email"))
-    if not db_user or db_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User is not an admin"
-        )
+    # The response depends only on the counts and the admin, so the ETag is
+    # derived from them and matches on every worker
+    etag = make_etag(sorted(counts.items(), key=repr), db_user)
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
     
-    # Get statistics
-    pending_items = db.query(get_found_items).filter_by(status="pending").count()
-    total_items = db.query(get_found_items).count()
-    approved_items = db.query(get_found_items).filter_by(status="approved").count()
+    pending_items = counts.get("pending", 0)
+    approved_items = counts.get("approved", 0)
+    total_items = sum(counts.values())
     
-    return {
+    return ORJSONResponse({
         "status": "success",
         "admin": {
             "id": db_user.id,
@@ -217,15 +212,17 @@ def admin_dashboard(
             "total_items": total_items,
             "approved_items": approved_items
         }
-    }
+    }, headers={"ETag": etag})
 
 
 @router.get("/items/pending")
 def get_pending_items(
-    authorization: str,
+    db_user: UserSnapshot = Depends(require_admin),
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=50)
+    cursor: Optional[int] = Query(None, ge=1),
+    limit: int = Query(10, ge=1, le=50),
+    include_total: bool = Query(False)
 ):
     """
     Get pending items for admin review
@@ -234,55 +231,37 @@ def get_pending_items(
         authorization: "Bearer <token>"
     
     Query Parameters:
-        skip: Number of items to skip (pagination)
+        skip: Number of items to skip (offset pagination)
+        cursor: ID of the last item already seen (keyset pagination, preferred)
         limit: Number of items to return
+        include_total: Also return the total number of pending items
     
     Returns:
-        List of pending found items
+        List of pending found items, next page cursor, and optional total
         
     Raises:
         HTTPException: If token invalid or user not admin
     """
     
-    # Extract and verify token
-    token = extract_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user_data = get_user_from_token(token)
-    if not user_data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
-    # Get user and verify admin
-    db_user = get_user_by_email(db, user_data.get("email"))
-    if not db_user or db_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User is not an admin"
-        )
-    
     # Get pending items
-    from app.models.item_model import FoundItemDB
-    pending_items = db.query(FoundItemDB).filter(
-        FoundItemDB.status == "pending"
-    ).offset(skip).limit(limit).all()
+    pending_items = get_found_items(db, cursor, limit, "pending", skip)
     
-    return {
+    response = {
         "status": "success",
-        "items": pending_items
+        "items": [found_item_to_dict(item) for item in pending_items],
+        "next_cursor": pending_items[-1].id if len(pending_items) == limit else None
     }
+    if include_total:
+        # Served from the shared per-status counts, usually without a query
+        response["total"] = count_found_items(db, "pending")
+    
+    return ORJSONResponse(response)
 
 
 @router.post("/items/{item_id}/approve")
 def approve_item(
     item_id: int,
-    authorization: str,
+    db_user: UserSnapshot = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -301,53 +280,34 @@ def approve_item(
         HTTPException: If item not found, token invalid, or user not admin
     """
     
-    # Extract and verify token
-    token = extract_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user_data = get_user_from_token(token)
-    if not user_data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
-    # Get user and verify admin
-    db_user = get_user_by_email(db, user_data.get("email"))
-    if not db_user or db_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User is not an admin"
-        )
-    
-    # Get item
-    db_item = get_found_item_by_id(db, item_id)
+    # Update and return the item in one statement; no row means it did not exist
+    db_item = db.execute(
+        update(FoundItemDB)
+        .where(FoundItemDB.id == item_id)
+        .values(status="approved")
+        .returning(*FOUND_ITEM_COLUMNS)
+    ).one_or_none()
     if not db_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Item not found"
         )
     
-    # Update item status
-    db_item.status = "approved"
     db.commit()
-    db.refresh(db_item)
+    invalidate_item_counts()
+    invalidate_found_item_details([item_id])
     
     return {
         "status": "success",
         "message": "Item approved successfully",
-        "item": db_item
+        "item": found_item_to_dict(db_item)
     }
 
 
 @router.post("/items/{item_id}/reject")
 def reject_item(
     item_id: int,
-    authorization: str,
+    db_user: UserSnapshot = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -366,42 +326,98 @@ def reject_item(
         HTTPException: If item not found, token invalid, or user not admin
     """
     
-    # Extract and verify token
-    token = extract_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user_data = get_user_from_token(token)
-    if not user_data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
-    # Get user and verify admin
-    db_user = get_user_by_email(db, user_data.get("email"))
-    if not db_user or db_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User is not an admin"
-        )
-    
-    # Get item
-    db_item = get_found_item_by_id(db, item_id)
-    if not db_item:
+    # Delete item in a single statement; no row means it did not exist
+    deleted = db.execute(delete(FoundItemDB).where(FoundItemDB.id == item_id)).rowcount
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Item not found"
         )
     
-    # Delete item
-    db.delete(db_item)
     db.commit()
+    invalidate_item_counts()
+    invalidate_found_item_details([item_id])
     
     return {
         "status": "success",
         "message": "Item rejected and deleted"
     }
+
+
+@router.post("/items/bulk-approve")
+def bulk_approve_items(
+    request: BulkItemIdsRequest,
+    db_user: UserSnapshot = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Approve multiple found items in one statement
+    
+    Headers:
+        authorization: "Bearer <token>"
+    
+    Body:
+        ids: IDs of items to approve
+    
+    Returns:
+        Number and IDs of items approved (IDs that do not exist are ignored)
+        
+    Raises:
+        HTTPException: If token invalid or user not admin
+    """
+    
+    updated_ids = db.scalars(
+        update(FoundItemDB)
+        .where(FoundItemDB.id.in_(request.ids))
+        .values(status="approved")
+        .returning(FoundItemDB.id)
+    ).all()
+    db.commit()
+    invalidate_item_counts()
+    invalidate_found_item_details(updated_ids)
+    
+    return {
+        "status": "success",
+        "message": f"{len(updated_ids)} item(s) approved",
+        "updated": len(updated_ids),
+        "ids": updated_ids
+    }
+
+
+@router.post("/items/bulk-reject")
+def bulk_reject_items(
+    request: BulkItemIdsRequest,
+    db_user: UserSnapshot = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Reject and delete multiple found items in one statement
+    
+    Headers:
+        authorization: "Bearer <token>"
+    
+    Body:
+        ids: IDs of items to reject
+    
+    Returns:
+        Number and IDs of items deleted (IDs that do not exist are ignored)
+        
+    Raises:
+        HTTPException: If token invalid or user not admin
+    """
+    
+    deleted_ids = db.scalars(
+        delete(FoundItemDB)
+        .where(FoundItemDB.id.in_(request.ids))
+        .returning(FoundItemDB.id)
+    ).all()
+    db.commit()
+    invalidate_item_counts()
+    invalidate_found_item_details(deleted_ids)
+    
+    return {
+        "status": "success",
+        "message": f"{len(deleted_ids)} item(s) rejected and deleted",
+        "deleted": len(deleted_ids),
+        "ids": deleted_ids
+    }
@@ -3,28 +3,25 @@ Authentication routes for user signup and login
 Handles Firebase authentication integration
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import Dict
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app.db import get_db
 from app.models.user_model import (
     UserSignupRequest,
     UserResponse,
-    create_user,
-    get_user_by_email,
-    user_exists
+    to_user_response,
+    create_user_if_absent,
+    get_user_by_email
 )
 from app.utils.validators import validate_iba_email
-from app.utils.firebase_verify import (
-    extract_token_from_header,
-    get_user_from_token,
-    initialize_firebase
-)
+from app.utils.firebase_verify import get_user_from_token
+from app.utils.dependencies import get_token_user
+from app.utils.etag import make_etag, not_modified_response
 
 router = APIRouter()
 
-# Initialize Firebase on startup
-initialize_firebase()
-
 
 class LoginRequest:
     """Model for login request"""
@@ -62,22 +59,20 @@ def signup(
             detail="Only @iba.edu.pk email addresses are allowed"
         )
     
-    # Check if user already exists
-    if user_exists(db, request.email):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User with this email already exists"
-        )
-    
-    # Create user with default "user" role
-    db_user = create_user(
+    # Create user with default "user" role; the unique email index rejects existing users
+    db_user = create_user_if_absent(
         db=db,
         name=request.name,
         email=request.email,
         role="user"
     )
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists"
+        )
     
-    return db_user
+    return to_user_response(db_user)
 
 
 @router.post("/login")
@@ -112,9 +107,10 @@ def login(
             detail="Invalid email domain"
         )
     
-    # Verify Firebase token
+    # Verify Firebase token, which must belong to the email logging in
+    # (Firebase lowercases the email claim; users may type it in any case)
     user_data = get_user_from_token(token)
-    if not user_data:
+    if not user_data or (user_data.get("email") or "").casefold() != email.casefold():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
@@ -142,56 +138,56 @@ def login(
 
 @router.get("/verify-token")
 def verify_token(
-    authorization: str,
+    request: Request,
+    user_data: Dict = Depends(get_token_user),
     db: Session = Depends(get_db)
 ):
     """
     Verify Firebase token validity
     
+    The token is verified on every call (served from the token cache when
+    repeated); clients polling with If-None-Match get 304 while their
+    signup state and user record are unchanged.
+    
     Headers:
         authorization: "Bearer <token>"
     
     Returns:
-        Token validity status and user information
+        Token validity status and user information, or 304 if unchanged
         
     Raises:
         HTTPException: If token is invalid
     """
     
-    # Extract token from header
-    token = extract_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    # Verify token
-    user_data = get_user_from_token(token)
-    if not user_data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
     # Get user from database
     db_user = get_user_by_email(db, user_data.get("email"))
     if not db_user:
-        return {
+        etag = make_etag("needs_signup", user_data.get("email"))
+        content = {
             "status": "needs_signup",
             "email": user_data.get("email"),
             "message": "User needs to complete signup"
         }
-    
-    return {
-        "status": "valid",
-        "user": {
-            "id": db_user.id,
-            "name": db_user.name,
-            "email": db_user.email,
-            "role": db_user.role
+    else:
+        etag = make_etag("valid", db_user.id, db_user.name, db_user.email, db_user.role)
+        content = {
+            "status": "valid",
+            "user": {
+                "id": db_user.id,
+                "name": db_user.name,
+                "email": db_user.email,
+                "role": db_user.role
+            }
         }
-    }
+    
+    # Per-user response: browsers may keep it but must revalidate, proxies must not
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        not_modified.headers.update(headers)
+        return not_modified
+    
+    return ORJSONResponse(content, headers=headers)
 
 
 @router.post("/logout")
@@ -4,9 +4,13 @@ Handles upload, retrieval, and search functionality
 """
 
 import os
-import uuid
+import hashlib
+import secrets
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, status, Depends, File, UploadFile, Query
+from typing import Dict, Optional
+from fastapi import APIRouter, HTTPException, status, Depends, File, UploadFile, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app.db import get_db
 from app.models.item_model import (
@@ -15,50 +19,141 @@ from app.models.item_model import (
     FoundItemListResponse,
     LostItemRequest,
     LostItemResponse,
+    LostItemListResponse,
+    found_item_to_dict,
+    lost_item_to_dict,
     create_found_item,
     get_found_items,
-    get_found_item_by_id,
+    get_found_item_detail,
     get_found_items_by_user,
     create_lost_item,
     get_lost_items,
-    FoundItemDB,
-    LostItemDB
+    count_found_items,
+    count_lost_items,
+    get_items_version
 )
-from app.models.user_model import get_user_by_email, get_user_by_id
+from app.models.user_model import UserSnapshot
 from app.utils.validators import (
     validate_file_size,
-    sanitize_filename,
+    validate_image_signature,
     validate_required_fields
 )
-from app.utils.firebase_verify import (
-    extract_token_from_header,
-    get_user_from_token,
-    initialize_firebase
-)
+from app.utils.dependencies import get_token_user, get_current_user
+from app.utils.etag import make_etag, not_modified_response
 
 router = APIRouter()
 
 # Configuration
 UPLOAD_DIR = "uploads"
 MAX_FILE_SIZE_MB = 5
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read per chunk when streaming uploads
+ALLOWED_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".webp"})
+INVALID_FILE_TYPE_DETAIL = f"Invalid file type. Allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
 
-initialize_firebase()
+# Created once at import rather than on every upload
+os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
-def validate_image_file(filename: str) -> bool:
-    """Validate image file extension"""
-    _, ext = os.path.splitext(filename)
-    return ext.lower() in ALLOWED_EXTENSIONS
+def image_extension(filename: str) -> str:
+    """Lower-cased extension of filename, including the dot"""
+    return os.path.splitext(filename)[1].lower()
+
+
+def _store_upload(src, header: bytes, file_extension: str) -> str:
+    """
+    Store an upload's spooled body in UPLOAD_DIR under a content-addressed name
+    
+    Runs in a worker thread so disk I/O never blocks the event loop. The
+    body is hashed and size-checked first, so oversized uploads and
+    re-uploads of an existing image are never written. New images are
+    written to a temporary name and renamed into place once complete.
+    
+    Args:
+        src: Underlying file object of the upload, positioned after header
+        header: Bytes already read from the start of the upload
+        file_extension: Lower-cased extension for the stored file
+        
+    Returns:
+        Name of the stored file within UPLOAD_DIR
+        
+    Raises:
+        HTTPException: If the file is too large or cannot be written
+    """
+    body_start = src.tell()
+    digest = hashlib.sha256(header)
+    size = len(header)
+    while chunk := src.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if not validate_file_size(size, MAX_FILE_SIZE_MB):
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File size exceeds {MAX_FILE_SIZE_MB}MB limit"
+            )
+        digest.update(chunk)
+    
+    filename = f"{digest.hexdigest()[:32]}{file_extension}"
+    file_path = os.path.join(UPLOAD_DIR, filename)
+    if os.path.exists(file_path):
+        return filename
+    
+    partial_path = f"{file_path}.{secrets.token_hex(4)}.partial"
+    try:
+        src.seek(body_start)
+        with open(partial_path, "wb") as f:
+            f.write(header)
+            while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(partial_path, file_path)
+    except Exception as e:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"File upload failed: {str(e)}"
+        )
+    
+    return filename
+
+
+async def save_image_upload(file: UploadFile, file_extension: str) -> str:
+    """
+    Store an uploaded image in UPLOAD_DIR, deduplicated by content
+    
+    The upload is never held in memory as a whole; it is read from the
+    spooled body in fixed-size chunks and identical images share one file.
+    
+    Args:
+        file: Uploaded image file
+        file_extension: Validated, lower-cased extension from image_extension
+        
+    Returns:
+        Public URL of the saved image
+        
+    Raises:
+        HTTPException: If the content is not an image, the file is too
+            large, or it cannot be written
+    """
+    # Check magic bytes before reading the rest of the upload
+    header = await file.read(16)
+    if not validate_image_signature(header):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="File content is not a supported image"
+        )
+    
+    # One thread hop for hashing and copying instead of one per chunk
+    filename = await run_in_threadpool(_store_upload, file.file, header, file_extension)
+    
+    return f"/uploads/{filename}"
 
 
 @router.post("/found", response_model=FoundItemResponse, status_code=status.HTTP_201_CREATED)
 async def upload_found_item(
-    authorization: str,
     description: str,
     location: str,
     date_found: str,
     file: UploadFile = File(...),
+    db_user: UserSnapshot = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -82,29 +177,6 @@ async def upload_found_item(
         HTTPException: If authentication fails, validation fails, or upload fails
     """
     
-    # Extract and verify token
-    token = extract_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user_data = get_user_from_token(token)
-    if not user_data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
-    # Get user from database
-    db_user = get_user_by_email(db, user_data.get("email"))
-    if not db_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found in database"
-        )
-    
     # Validate file
     if not file.filename:
         raise HTTPException(
@@ -112,18 +184,11 @@ async def upload_found_item(
             detail="No file provided"
         )
     
-    if not validate_image_file(file.filename):
+    file_extension = image_extension(file.filename)
+    if file_extension not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    # Check file size
-    file_content = await file.read()
-    if not validate_file_size(len(file_content), MAX_FILE_SIZE_MB):
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File size exceeds {MAX_FILE_SIZE_MB}MB limit"
+            detail=INVALID_FILE_TYPE_DETAIL
         )
     
     # Validate required fields
@@ -151,28 +216,12 @@ async def upload_found_item(
             detail="Invalid date format. Use ISO format: 2024-01-15T14:30:00"
         )
     
-    # Save file
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    # Stream file to disk, enforcing the size limit
+    image_url = await save_image_upload(file, file_extension)
     
-    # Generate unique filename
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    try:
-        with open(file_path, "wb") as f:
-            f.write(file_content)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"File upload failed: {str(e)}"
-        )
-    
-    # Create image URL
-    image_url = f"/uploads/{unique_filename}"
-    
-    # Create database record
-    db_item = create_found_item(
+    # Create database record (blocking DB I/O runs off the event loop)
+    db_item = await run_in_threadpool(
+        create_found_item,
         db=db,
         user_id=db_user.id,
         description=description,
@@ -181,40 +230,49 @@ async def upload_found_item(
         image_url=image_url
     )
     
-    return db_item
+    return ORJSONResponse(found_item_to_dict(db_item), status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/found", response_model=FoundItemListResponse)
 def get_found_items_list(
+    request: Request,
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0),
+    cursor: Optional[int] = Query(None, ge=1),
     limit: int = Query(10, ge=1, le=50),
-    status_filter: str = Query("approved", regex="^(pending|approved|claimed|all)$")
+    status_filter: str = Query("approved", pattern="^(pending|approved|claimed|all)$"),
+    include_total: bool = Query(True)
 ):
     """
     Get list of found items
     
     Query Parameters:
-        skip: Number of items to skip (pagination)
+        skip: Number of items to skip (offset pagination)
+        cursor: ID of the last item already seen (keyset pagination, preferred)
         limit: Number of items to return
         status_filter: Filter by status (pending, approved, claimed, or all)
+        include_total: Set to false to skip counting (total is null)
     
     Returns:
-        List of found items with total count
+        List of found items with total count and next page cursor, or 304 if unchanged
     """
     
-    query = db.query(FoundItemDB)
-    
-    if status_filter != "all":
-        query = query.filter(FoundItemDB.status == status_filter)
-    
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
-    
-    return FoundItemListResponse(
-        items=items,
-        total=total
-    )
+    # The total comes from the short-lived count cache, so it is part of the ETag
+    total = count_found_items(db, status_filter) if include_total else None
+    etag = make_etag(get_items_version(db), request.url.path, request.url.query, total)
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
+    
+    # Keyset pagination: seek past the last item of the previous page
+    items = get_found_items(db, cursor, limit, status_filter, skip)
+    
+    # Encode directly with orjson, bypassing pydantic response serialization
+    return ORJSONResponse({
+        "items": [found_item_to_dict(item) for item in items],
+        "total": total,
+        "next_cursor": items[-1].id if len(items) == limit else None
+    }, headers={"ETag": etag})
 
 
 @router.get("/found/{item_id}", response_model=FoundItemResponse)
@@ -235,20 +293,20 @@ def get_found_item(
         HTTPException: If item not found
     """
     
-    db_item = get_found_item_by_id(db, item_id)
-    if not db_item:
+    item = get_found_item_detail(db, item_id)
+    if item is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Found item not found"
         )
     
-    return db_item
+    return ORJSONResponse(item)
 
 
 @router.get("/found/user/{user_id}")
 def get_user_found_items(
     user_id: int,
-    authorization: str,
+    user_data: Dict = Depends(get_token_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -268,38 +326,23 @@ def get_user_found_items(
         HTTPException: If authentication fails
     """
     
-    # Extract and verify token
-    token = extract_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user_data = get_user_from_token(token)
-    if not user_data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
     # Get items
     items = get_found_items_by_user(db, user_id)
     
-    return {
+    return ORJSONResponse({
         "status": "success",
-        "items": items,
+        "items": [found_item_to_dict(item) for item in items],
         "total": len(items)
-    }
+    })
 
 
 @router.post("/lost", response_model=LostItemResponse, status_code=status.HTTP_201_CREATED)
 async def upload_lost_item(
-    authorization: str,
     description: str,
     location: str,
     date_lost: str,
     file: UploadFile = File(...),
+    db_user: UserSnapshot = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -323,29 +366,6 @@ async def upload_lost_item(
         HTTPException: If authentication fails, validation fails, or upload fails
     """
     
-    # Extract and verify token
-    token = extract_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user_data = get_user_from_token(token)
-    if not user_data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
-    # Get user from database
-    db_user = get_user_by_email(db, user_data.get("email"))
-    if not db_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found in database"
-        )
-    
     # Validate file
     if not file.filename:
         raise HTTPException(
@@ -353,18 +373,11 @@ async def upload_lost_item(
             detail="No file provided"
         )
     
-    if not validate_image_file(file.filename):
+    file_extension = image_extension(file.filename)
+    if file_extension not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    # Check file size
-    file_content = await file.read()
-    if not validate_file_size(len(file_content), MAX_FILE_SIZE_MB):
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File size exceeds {MAX_FILE_SIZE_MB}MB limit"
+            detail=INVALID_FILE_TYPE_DETAIL
         )
     
     # Validate required fields
@@ -392,28 +405,12 @@ async def upload_lost_item(
             detail="Invalid date format. Use ISO format: 2024-01-15T14:30:00"
         )
     
-    # Save file
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    
-    # Generate unique filename
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    try:
-        with open(file_path, "wb") as f:
-            f.write(file_content)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"File upload failed: {str(e)}"
-        )
-    
-    # Create image URL
-    image_url = f"/uploads/{unique_filename}"
+    # Stream file to disk, enforcing the size limit
+    image_url = await save_image_upload(file, file_extension)
     
-    # Create database record
-    db_item = create_lost_item(
+    # Create database record (blocking DB I/O runs off the event loop)
+    db_item = await run_in_threadpool(
+        create_lost_item,
         db=db,
         user_id=db_user.id,
         description=description,
@@ -422,37 +419,46 @@ async def upload_lost_item(
         image_url=image_url
     )
     
-    return db_item
+    return ORJSONResponse(lost_item_to_dict(db_item), status_code=status.HTTP_201_CREATED)
 
 
-@router.get("/lost")
+@router.get("/lost", response_model=LostItemListResponse)
 def get_lost_items_list(
+    request: Request,
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0),
+    cursor: Optional[int] = Query(None, ge=1),
     limit: int = Query(10, ge=1, le=50),
-    status_filter: str = Query("approved", regex="^(pending|approved|found|all)$")
+    status_filter: str = Query("approved", pattern="^(pending|approved|found|all)$"),
+    include_total: bool = Query(True)
 ):
     """
     Get list of lost items
     
     Query Parameters:
-        skip: Number of items to skip (pagination)
+        skip: Number of items to skip (offset pagination)
+        cursor: ID of the last item already seen (keyset pagination, preferred)
         limit: Number of items to return
         status_filter: Filter by status (pending, approved, found, or all)
+        include_total: Set to false to skip counting (total is null)
     
     Returns:
-        List of lost items with total count
+        List of lost items with total count and next page cursor, or 304 if unchanged
     """
     
-    query = db.query(LostItemDB)
-    
-    if status_filter != "all":
-        query = query.filter(LostItemDB.status == status_filter)
-    
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
-    
-    return {
-        "items": items,
-        "total": total
-    }
+    # The total comes from the short-lived count cache, so it is part of the ETag
+    total = count_lost_items(db, status_filter) if include_total else None
+    etag = make_etag(get_items_version(db), request.url.path, request.url.query, total)
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
+    
+    # Keyset pagination: seek past the last item of the previous page
+    items = get_lost_items(db, cursor, limit, status_filter, skip)
+    
+    # Encode directly with orjson, bypassing pydantic response serialization
+    return ORJSONResponse({
+        "items": [lost_item_to_dict(item) for item in items],
+        "total": total,
+        "next_cursor": items[-1].id if len(items) == limit else None
+    }, headers={"ETag": etag})
@@ -0,0 +1,84 @@
+"""
+In-process caching utilities
+Bounded LRU cache with per-entry time-to-live
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed TTL
+
+    Oldest entries are evicted once maxsize is reached.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss or expired entry
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Optional TTL in seconds overriding the cache default
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key and return its value (or default if absent)"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+_MISSING = object()
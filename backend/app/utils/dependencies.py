@@ -0,0 +1,89 @@
+"""
+Shared FastAPI dependencies for authenticated routes
+Resolves the Authorization header to a verified user once per request
+"""
+
+from typing import Optional, Dict
+from fastapi import Depends, Header, HTTPException, status
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.models.user_model import UserSnapshot, get_user_by_email
+from app.utils.firebase_verify import extract_token_from_header, get_user_from_token_async
+
+
+async def get_token_user(authorization: Optional[str] = Header(None)) -> Dict:
+    """
+    Verify the Firebase token from the Authorization header
+
+    Headers:
+        authorization: "Bearer <token>"
+
+    Returns:
+        Dict containing user email, uid, and other claims
+
+    Raises:
+        HTTPException: If the header is malformed or the token is invalid
+    """
+    token = extract_token_from_header(authorization)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authorization header format"
+        )
+
+    user_data = await get_user_from_token_async(token)
+    if not user_data:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+
+    return user_data
+
+
+def get_current_user(
+    user_data: Dict = Depends(get_token_user),
+    db: Session = Depends(get_db)
+) -> UserSnapshot:
+    """
+    Resolve the authenticated user's database record
+
+    Returns:
+        User snapshot for the token's email
+
+    Raises:
+        HTTPException: If the token is invalid or the user is not registered
+    """
+    db_user = get_user_by_email(db, user_data.get("email"))
+    if not db_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found in database"
+        )
+
+    return db_user
+
+
+def require_admin(
+    user_data: Dict = Depends(get_token_user),
+    db: Session = Depends(get_db)
+) -> UserSnapshot:
+    """
+    Resolve the authenticated user and require the admin role
+
+    Returns:
+        User snapshot of the admin
+
+    Raises:
+        HTTPException: If the token is invalid or the user is not an admin
+    """
+    # The role is read from the database, not the user cache, so a demoted
+    # or deleted admin loses access immediately
+    db_user = get_user_by_email(db, user_data.get("email"), use_cache=False)
+    if not db_user or db_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User is not an admin"
+        )
+
+    return db_user
@@ -0,0 +1,44 @@
+"""
+HTTP conditional request helpers
+Builds weak ETags and answers If-None-Match with 304 Not Modified
+"""
+
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a weak ETag from the values a response depends on
+    
+    Args:
+        parts: Values identifying the response content (version, query, user)
+        
+    Returns:
+        Weak ETag header value
+    """
+    key = "|".join(str(part) for part in parts).encode()
+    return f'W/"{hashlib.blake2b(key, digest_size=8).hexdigest()}"'
+
+
+def not_modified_response(request: Request, etag: str) -> Optional[Response]:
+    """
+    Return a 304 response if the client already has this ETag
+    
+    Args:
+        request: Incoming request
+        etag: ETag of the response that would be sent
+        
+    Returns:
+        304 Response if If-None-Match matches, None otherwise
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    if etag in tags or "*" in tags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    return None
@@ -4,15 +4,54 @@ Handles JWT token validation and user authentication
 """
 
 import os
-from typing import Optional, Dict
+import time
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
+from typing import Optional, Dict, Tuple
+import orjson
 import firebase_admin
 from firebase_admin import credentials, auth
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from app.utils.cache import TTLCache
+from app.utils.shared_cache import shared_get, shared_set
+
+logger = logging.getLogger(__name__)
+
+# Verified tokens are cached so repeat requests skip signature verification.
+# Entries never outlive the token's own "exp" claim.
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+TOKEN_CACHE_MAXSIZE = int(os.getenv("TOKEN_CACHE_MAXSIZE", "10000"))
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+# Tokens Firebase rejected (bad signature, expired, revoked) are remembered
+# briefly so replayed or forged tokens skip another signature check.
+# Transient failures such as certificate fetch errors are never cached.
+INVALID_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("INVALID_TOKEN_CACHE_TTL_SECONDS", "5"))
+INVALID_TOKEN_CACHE_MAXSIZE = int(os.getenv("INVALID_TOKEN_CACHE_MAXSIZE", "50000"))
+_invalid_token_cache = TTLCache(maxsize=INVALID_TOKEN_CACHE_MAXSIZE, ttl=INVALID_TOKEN_CACHE_TTL_SECONDS)
+
+# Verified tokens are also shared between workers when REDIS_URL is set
+SHARED_TOKEN_CACHE_TTL_SECONDS = int(os.getenv("SHARED_TOKEN_CACHE_TTL_SECONDS", "300"))
+
+# Google's token-signing certificates are cached for several hours; they are
+# re-fetched in the background well before that so no request waits on it
+PUBLIC_KEY_REFRESH_SECONDS = int(os.getenv("FIREBASE_KEY_REFRESH_SECONDS", "3600"))
+
+
+class InvalidTokenError(HTTPException):
+    """The token itself was rejected, as opposed to verification being unavailable"""
+    
+    def __init__(self, detail: str):
+        super().__init__(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
 
 
 def initialize_firebase():
     """
-    Initialize Firebase Admin SDK
+    Initialize Firebase Admin SDK, called once from the app lifespan
     Ensure FIREBASE_CONFIG_PATH environment variable points to credentials JSON
     """
     try:
@@ -26,13 +65,46 @@ def initialize_firebase():
                 # For development, use default credentials
                 firebase_admin.initialize_app()
     except Exception as e:
-        print(f"Firebase initialization error: {e}")
-        print("Note: Firebase is optional for development. Set FIREBASE_CONFIG_PATH for production.")
+        logger.warning(
+            "Firebase initialization error: %s. Firebase is optional for development; "
+            "set FIREBASE_CONFIG_PATH for production.",
+            e
+        )
+
+
+def refresh_public_keys() -> None:
+    """
+    Re-fetch Google's ID token certificates into the Admin SDK's HTTP cache
+    
+    verify_id_token reads the certificates through a Cache-Control aware
+    session; bypassing the cache here replaces the entry before it expires.
+    """
+    if not firebase_admin._apps:
+        return
+    
+    verifier = auth._get_client(None)._token_verifier
+    verifier.request(
+        url=verifier.id_token_verifier.cert_url,
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+async def refresh_public_keys_periodically() -> None:
+    """Keep the signing certificates warm for the lifetime of the app"""
+    while True:
+        try:
+            await run_in_threadpool(refresh_public_keys)
+        except Exception as e:
+            logger.warning("Could not refresh Firebase public keys: %s", e)
+        await asyncio.sleep(PUBLIC_KEY_REFRESH_SECONDS)
 
 
 def verify_token(token: str) -> Optional[Dict]:
     """
     Verify Firebase JWT token and extract user claims
+    The signature is checked locally against Google's public certificates,
+    which the Admin SDK caches for the lifetime given by their Cache-Control
+    header, so no network round-trip is made per token
     
     Args:
         token: Firebase ID token
@@ -41,22 +113,16 @@ def verify_token(token: str) -> Optional[Dict]:
         Dict with user claims if valid, None otherwise
         
     Raises:
-        HTTPException: If token is invalid or expired
+        InvalidTokenError: If token is invalid or expired
+        HTTPException: If the token could not be verified (e.g. certificates unavailable)
     """
     try:
-        initialize_firebase()
         decoded_token = auth.verify_id_token(token)
         return decoded_token
-    except auth.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has expired"
-        )
+    except auth.ExpiredIdTokenError:
+        raise InvalidTokenError("Token has expired")
     except auth.InvalidIdTokenError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
+        raise InvalidTokenError("Invalid token")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -64,26 +130,135 @@ def verify_token(token: str) -> Optional[Dict]:
         )
 
 
+def _shared_cache_get(cache_key: bytes) -> Optional[Tuple[Dict, float]]:
+    """Look up verified claims and their expiry in the shared cache"""
+    raw = shared_get("tok:" + cache_key.hex())
+    if raw is None:
+        return None
+    entry = orjson.loads(raw)
+    return entry["user"], entry["exp"]
+
+
+def _shared_cache_set(cache_key: bytes, user_data: Dict, expires_at: float) -> None:
+    """Store verified claims in the shared cache until the token expires"""
+    shared_set(
+        "tok:" + cache_key.hex(),
+        orjson.dumps({"user": user_data, "exp": expires_at}),
+        int(min(SHARED_TOKEN_CACHE_TTL_SECONDS, expires_at - time.time()))
+    )
+
+
+def _is_well_formed_jwt(token: str) -> bool:
+    """
+    Cheap structural check run before any cache lookup or signature verification
+    
+    Args:
+        token: Candidate Firebase ID token
+        
+    Returns:
+        True if the token has three segments and an RS256 JSON header
+    """
+    if token.count(".") != 2:
+        return False
+    
+    header_b64 = token.partition(".")[0]
+    try:
+        header = orjson.loads(base64.urlsafe_b64decode(header_b64 + "=" * (-len(header_b64) % 4)))
+    except (binascii.Error, ValueError):
+        return False
+    
+    return isinstance(header, dict) and header.get("alg") == "RS256"
+
+
+def _token_cache_key(token: str) -> bytes:
+    """
+    Cache key for a token
+    
+    First 128 bits of SHA-256: collision-safe, half the size of the full
+    digest, and faster than BLAKE2b where SHA extensions are available.
+    """
+    return hashlib.sha256(token.encode()).digest()[:16]
+
+
 def get_user_from_token(token: str) -> Optional[Dict]:
     """
     Extract user information from verified token
+    Results are cached per token for up to TOKEN_CACHE_TTL_SECONDS, and in
+    Redis (shared by all workers) when REDIS_URL is configured; tokens Firebase
+    rejects are cached for INVALID_TOKEN_CACHE_TTL_SECONDS
     
     Args:
         token: Firebase ID token
         
     Returns:
-        Dict containing user email, uid, and other claims
+        Dict containing user email, uid, and other claims, or None if invalid
     """
-    try:
-        decoded_token = verify_token(token)
-        return {
+    # Reject garbage without hashing, caching, or calling the Admin SDK
+    if not _is_well_formed_jwt(token):
+        return None
+    
+    cache_key = _token_cache_key(token)
+    user_data = _token_cache.get(cache_key)
+    if user_data is not None:
+        return user_data
+    
+    if cache_key in _invalid_token_cache:
+        return None
+    
+    # Another worker's entry is only trusted while the token itself is unexpired
+    shared = _shared_cache_get(cache_key)
+    if shared is not None and shared[1] > time.time():
+        user_data, expires_at = shared
+    else:
+        try:
+            decoded_token = verify_token(token)
+        except InvalidTokenError:
+            _invalid_token_cache.set(cache_key, True)
+            return None
+        except HTTPException:
+            return None
+        
+        user_data = {
             "uid": decoded_token.get("uid"),
             "email": decoded_token.get("email"),
             "name": decoded_token.get("name"),
             "email_verified": decoded_token.get("email_verified", False)
         }
-    except HTTPException:
+        expires_at = decoded_token.get("exp", time.time() + TOKEN_CACHE_TTL_SECONDS)
+        _shared_cache_set(cache_key, user_data, expires_at)
+    
+    # Only successful verifications are cached, capped at the token's expiry
+    ttl = min(TOKEN_CACHE_TTL_SECONDS, expires_at - time.time())
+    if ttl > 0:
+        _token_cache.set(cache_key, user_data, ttl=ttl)
+    
+    return user_data
+
+
+async def get_user_from_token_async(token: str) -> Optional[Dict]:
+    """
+    Async counterpart of get_user_from_token for use on the event loop
+    Local cache hits (valid or invalid) are answered inline; Redis lookups and signature
+    verification run in the threadpool so they never block the loop
+    
+    Args:
+        token: Firebase ID token
+        
+    Returns:
+        Dict containing user email, uid, and other claims, or None if invalid
+    """
+    if not _is_well_formed_jwt(token):
         return None
+    
+    cache_key = _token_cache_key(token)
+    user_data = _token_cache.get(cache_key)
+    if user_data is not None:
+        return user_data
+    
+    if cache_key in _invalid_token_cache:
+        return None
+    
+    return await run_in_threadpool(get_user_from_token, token)
 
 
 def extract_token_from_header(authorization_header: Optional[str]) -> Optional[str]:
@@ -0,0 +1,125 @@
+"""
+Optional Redis cache shared by all workers
+Disabled when REDIS_URL is unset; errors fall back to a cache miss
+"""
+
+import os
+import time
+import logging
+from typing import Optional
+
+try:
+    import redis
+except ImportError:  # Only needed when REDIS_URL is set
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+# After a connection or command error Redis is skipped for this long
+REDIS_RETRY_SECONDS = 30
+
+_redis_client = None
+_redis_retry_at = 0.0
+
+
+def _get_redis():
+    """Return the Redis client, or None if disabled or backing off"""
+    global _redis_client
+    if not REDIS_URL or redis is None or time.monotonic() < _redis_retry_at:
+        return None
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            REDIS_URL,
+            socket_timeout=0.1,
+            socket_connect_timeout=0.1
+        )
+    return _redis_client
+
+
+def _redis_failed(e: Exception) -> None:
+    """Stop using Redis for a while after an error"""
+    global _redis_retry_at
+    _redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+    logger.warning("Shared cache unavailable, falling back to local caches: %s", e)
+
+
+def shared_get(key: str) -> Optional[bytes]:
+    """
+    Get a value from the shared cache
+    
+    Args:
+        key: Cache key
+        
+    Returns:
+        Stored bytes, or None on a miss or if Redis is unavailable
+    """
+    client = _get_redis()
+    if client is None:
+        return None
+    
+    try:
+        return client.get(key)
+    except redis.RedisError as e:
+        _redis_failed(e)
+        return None
+
+
+def shared_set(key: str, value: bytes, ttl: int) -> None:
+    """
+    Store a value in the shared cache
+    
+    Args:
+        key: Cache key
+        value: Bytes to store
+        ttl: Expiry in seconds (values below 1 are not stored)
+    """
+    client = _get_redis()
+    if client is None or ttl <= 0:
+        return
+    
+    try:
+        client.setex(key, ttl, value)
+    except redis.RedisError as e:
+        _redis_failed(e)
+
+
+def shared_incr(key: str) -> None:
+    """
+    Atomically increment an integer counter in the shared cache
+    
+    Args:
+        key: Counter key (created at 0 if missing)
+    """
+    client = _get_redis()
+    if client is None:
+        return
+    
+    try:
+        client.incr(key)
+    except redis.RedisError as e:
+        _redis_failed(e)
+
+
+def shared_counter(key: str) -> Optional[int]:
+    """
+    Read an integer counter from the shared cache
+    
+    Args:
+        key: Counter key
+        
+    Returns:
+        Counter value (0 if never incremented), or None if Redis is unavailable
+    """
+    client = _get_redis()
+    if client is None:
+        return None
+    
+    try:
+        value = client.get(key)
+    except redis.RedisError as e:
+        _redis_failed(e)
+        return None
+    
+    return int(value or 0)
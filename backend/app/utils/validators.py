@@ -4,9 +4,17 @@ Validates email domains, file sizes, and required fields
 """
 
 import re
+import string
+from functools import lru_cache
 from typing import Optional
 
+IBA_EMAIL_SUFFIX = "@iba.edu.pk"
+EMAIL_LOCAL_PART_CHARS = frozenset(string.ascii_letters + string.digits + "._%+-")
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s.-]')
 
+
+@lru_cache(maxsize=4096)
 def validate_iba_email(email: str) -> bool:
     """
     Validate that email is from IBA domain (@iba.edu.pk)
@@ -17,11 +25,12 @@ def validate_iba_email(email: str) -> bool:
     Returns:
         bool: True if valid IBA email, False otherwise
     """
-    if not email:
+    # Suffix test, then a character-set check on the local part (no regex)
+    if not email or not email.endswith(IBA_EMAIL_SUFFIX):
         return False
     
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@iba\.edu\.pk$'
-    return re.match(email_pattern, email) is not None
+    local_part = email[:-len(IBA_EMAIL_SUFFIX)]
+    return bool(local_part) and EMAIL_LOCAL_PART_CHARS.issuperset(local_part)
 
 
 def validate_email_format(email: str) -> bool:
@@ -37,8 +46,7 @@ def validate_email_format(email: str) -> bool:
     if not email:
         return False
     
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(email_pattern, email) is not None
+    return EMAIL_PATTERN.fullmatch(email) is not None
 
 
 def validate_file_size(file_size: int, max_size_mb: int = 5) -> bool:
@@ -56,6 +64,32 @@ def validate_file_size(file_size: int, max_size_mb: int = 5) -> bool:
     return file_size <= max_size_bytes
 
 
+# Leading "magic" bytes of the supported image formats
+IMAGE_SIGNATURES = (
+    b"\xff\xd8\xff",        # JPEG
+    b"\x89PNG\r\n\x1a\n",   # PNG
+    b"GIF87a",              # GIF
+    b"GIF89a",              # GIF
+)
+
+
+def validate_image_signature(header: bytes) -> bool:
+    """
+    Validate that file content starts with a known image signature
+    
+    Args:
+        header: First bytes of the file (at least 12)
+        
+    Returns:
+        bool: True if the bytes match JPEG, PNG, GIF, or WebP, False otherwise
+    """
+    if header.startswith(IMAGE_SIGNATURES):
+        return True
+    
+    # WebP: "RIFF" <4-byte size> "WEBP"
+    return header[:4] == b"RIFF" and header[8:12] == b"WEBP"
+
+
 def validate_required_fields(data: dict, required_fields: list) -> tuple[bool, Optional[str]]:
     """
     Validate that all required fields are present and non-empty
@@ -89,6 +123,6 @@ def sanitize_filename(filename: str) -> str:
     filename = filename.replace("/", "_").replace("\\", "_")
     
     # Keep only safe characters
-    filename = re.sub(r'[^\w\s.-]', '', filename)
+    filename = UNSAFE_FILENAME_CHARS.sub('', filename)
     
     return filename
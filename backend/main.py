@@ -3,20 +3,60 @@ Main entry point for Talash Backend API
 FastAPI application with Firebase authentication and item management
 """
 
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from anyio import to_thread
+from fastapi import FastAPI, Request, status
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
+from sqlalchemy.exc import SQLAlchemyError
 from app.db import init_db
 from app.routes import auth_routes, items_routes, admin_routes
+from app.utils.firebase_verify import initialize_firebase, refresh_public_keys_periodically
+
+logger = logging.getLogger(__name__)
+
+# Worker threads for sync endpoints and run_in_threadpool calls.
+# Requests beyond this many wait for a thread, so size it with the DB pool.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Configure process-wide resources and background tasks"""
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    initialize_firebase()
+    key_refresher = asyncio.create_task(refresh_public_keys_periodically())
+    yield
+    key_refresher.cancel()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Talash API",
     description="Campus Lost and Found Portal Backend",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+class APIGZipMiddleware(GZipMiddleware):
+    """Gzip API responses; uploaded images are already compressed"""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/uploads/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress JSON responses over 1 KB (item lists are highly repetitive)
+app.add_middleware(APIGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -26,10 +66,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Serve static files (uploads)
-if not os.path.exists("uploads"):
-    os.makedirs("uploads")
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+class UploadStaticFiles(StaticFiles):
+    """
+    Serve uploads with long-lived, immutable caching
+    Upload names are derived from the SHA-256 of the file content, so a given
+    name always refers to the same bytes (identical re-uploads share one file)
+    """
+    
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+# Serve static files (uploads); in production let the reverse proxy serve
+# /uploads/ straight from disk so image bytes never pass through Python.
+# items_routes creates UPLOAD_DIR when it is imported.
+app.mount("/uploads", UploadStaticFiles(directory=items_routes.UPLOAD_DIR), name="uploads")
 
 # Initialize database
 init_db()
@@ -40,6 +93,19 @@ app.include_router(items_routes.router, prefix="/api/items", tags=["Items"])
 app.include_router(admin_routes.router, prefix="/api/admin", tags=["Admin"])
 
 
+@app.exception_handler(SQLAlchemyError)
+async def database_error_handler(request: Request, exc: SQLAlchemyError):
+    """
+    Return a JSON 500 for unhandled database errors
+    The request's session is rolled back and returned to the pool by get_db
+    """
+    logger.exception("Database error on %s %s", request.method, request.url.path)
+    return ORJSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": "Database error"}
+    )
+
+
 @app.get("/")
 def read_root():
     """Health check endpoint"""
@@ -0,0 +1,10 @@
+"""
+Test package for Talash Backend API
+Points the app at a throwaway SQLite database before anything imports it
+"""
+
+import os
+import tempfile
+
+_TEST_DIR = tempfile.mkdtemp(prefix="talash-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DIR, 'talash.db')}"
@@ -0,0 +1,59 @@
+"""
+Shared helpers for API tests
+"""
+
+import base64
+from unittest import mock
+import orjson
+from fastapi import HTTPException, status
+from fastapi.testclient import TestClient
+from app.utils import firebase_verify
+import main
+
+# Header segment of an RS256 JWT, so tokens pass the structural prefilter
+_JWT_HEADER = base64.urlsafe_b64encode(orjson.dumps({"alg": "RS256"})).decode().rstrip("=")
+
+
+def make_token(name: str) -> str:
+    """Build a well-formed (but unsigned) JWT string unique to name"""
+    payload = base64.urlsafe_b64encode(name.encode()).decode().rstrip("=")
+    return f"{_JWT_HEADER}.{payload}.sig"
+
+
+def fake_firebase(claims_by_token: dict):
+    """
+    Patch Firebase verification to accept only the given tokens
+    
+    Args:
+        claims_by_token: Maps token to the email claim Firebase would return
+        
+    Returns:
+        Patch context manager
+    """
+    def verify_id_token(token, *args, **kwargs):
+        if token not in claims_by_token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        return {"uid": token, "email": claims_by_token[token]}
+    
+    return mock.patch.object(firebase_verify.auth, "verify_id_token", verify_id_token)
+
+
+def make_client() -> TestClient:
+    """Test client for the app (lifespan is not run, so Firebase is never initialized)"""
+    return TestClient(main.app)
+
+
+class FakeRedis:
+    """In-memory stand-in for the few Redis commands the shared cache uses"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+    
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b"0")) + 1).encode()
@@ -0,0 +1,79 @@
+"""
+Tests for user and admin login
+"""
+
+import unittest
+from sqlalchemy import update
+from app.db import SessionLocal
+from app.models.user_model import UserDB
+from tests.helpers import make_token, fake_firebase, make_client
+
+
+class LoginEmailTest(unittest.TestCase):
+    """Login binds the token to the email, ignoring case"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.client = make_client()
+        cls.client.post("/api/auth/signup", json={"name": "John", "email": "John.Doe@iba.edu.pk"})
+        cls.client.post(
+            "/api/admin/signup",
+            json={"name": "Admin", "email": "Head.Admin@iba.edu.pk", "admin_key": "admin_secret_2024"}
+        )
+    
+    def test_login_with_mixed_case_email(self):
+        token = make_token("login-mixed-case")
+        # Firebase returns the email claim in lowercase
+        with fake_firebase({token: "john.doe@iba.edu.pk"}):
+            response = self.client.post(
+                "/api/auth/login", params={"email": "John.Doe@iba.edu.pk", "token": token}
+            )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["email"], "John.Doe@iba.edu.pk")
+    
+    def test_admin_login_with_mixed_case_email(self):
+        token = make_token("admin-login-mixed-case")
+        with fake_firebase({token: "head.admin@iba.edu.pk"}):
+            response = self.client.post(
+                "/api/admin/login", params={"email": "Head.Admin@iba.edu.pk", "token": token}
+            )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["admin"]["role"], "admin")
+    
+    def test_login_rejects_token_for_another_email(self):
+        token = make_token("login-other-user")
+        with fake_firebase({token: "someone.else@iba.edu.pk"}):
+            response = self.client.post(
+                "/api/auth/login", params={"email": "John.Doe@iba.edu.pk", "token": token}
+            )
+        
+        self.assertEqual(response.status_code, 401)
+
+
+
+class AdminRoleTest(unittest.TestCase):
+    """Admin access follows the role in the database, not the user cache"""
+    
+    def test_demoted_admin_loses_access_immediately(self):
+        client = make_client()
+        client.post(
+            "/api/admin/signup",
+            json={"name": "Temp", "email": "temp.admin@iba.edu.pk", "admin_key": "admin_secret_2024"}
+        )
+        token = make_token("demoted-admin")
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        with fake_firebase({token: "temp.admin@iba.edu.pk"}):
+            self.assertEqual(client.get("/api/admin/dashboard", headers=headers).status_code, 200)
+            
+            with SessionLocal() as db:
+                db.execute(update(UserDB).where(UserDB.email == "temp.admin@iba.edu.pk").values(role="user"))
+                db.commit()
+            
+            self.assertEqual(client.get("/api/admin/dashboard", headers=headers).status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Tests for ETag revalidation of the item lists across workers
+"""
+
+import unittest
+from datetime import datetime
+from unittest import mock
+from app.db import SessionLocal
+from app.models import item_model
+from app.models.item_model import FoundItemDB, invalidate_item_counts
+from app.models.user_model import create_user_if_absent, get_user_by_email
+from app.utils import shared_cache
+from tests.helpers import FakeRedis, make_client
+
+LIST_URL = "/api/items/found?status_filter=all"
+
+
+class ItemListETagTest(unittest.TestCase):
+    """ETags depend only on shared state, so any worker can answer 304"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.client = make_client()
+        with SessionLocal() as db:
+            create_user_if_absent(db, "Poller", "poller@iba.edu.pk")
+            cls.user_id = get_user_by_email(db, "poller@iba.edu.pk").id
+    
+    def _add_item(self):
+        with SessionLocal() as db:
+            db.add(FoundItemDB(
+                user_id=self.user_id,
+                description="Keys",
+                location="Gym",
+                date_found=datetime(2024, 1, 15)
+            ))
+            db.commit()
+    
+    def _assert_revalidation(self):
+        etag = self.client.get(LIST_URL).headers["ETag"]
+        
+        # Another worker: same data, its own (empty) local caches
+        item_model._item_counts.clear()
+        response = self.client.get(LIST_URL, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        
+        # A write made by another worker changes the ETag right away (that
+        # worker bumps the shared version but cannot clear our local caches)
+        self._add_item()
+        shared_cache.shared_incr(item_model.SHARED_ITEMS_VERSION_KEY)
+        response = self.client.get(LIST_URL, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+    
+    def test_revalidation_from_database_signature(self):
+        invalidate_item_counts()
+        self._assert_revalidation()
+    
+    def test_revalidation_from_shared_version(self):
+        redis = FakeRedis()
+        with mock.patch.object(shared_cache, "_get_redis", lambda: redis):
+            invalidate_item_counts()
+            self._assert_revalidation()
+
+
+if __name__ == "__main__":
+    unittest.main()
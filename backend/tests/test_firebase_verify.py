@@ -0,0 +1,74 @@
+"""
+Tests for Authorization header parsing
+"""
+
+import unittest
+from unittest import mock
+from firebase_admin import auth
+from app.utils import firebase_verify
+from app.utils.firebase_verify import extract_token_from_header, get_user_from_token
+from tests.helpers import make_token
+
+
+class ExtractTokenFromHeaderTest(unittest.TestCase):
+    """"Bearer <token>" parsing, split on any whitespace"""
+    
+    def test_valid_headers(self):
+        cases = {
+            "Bearer abc.def.ghi": "abc.def.ghi",
+            "bearer abc.def.ghi": "abc.def.ghi",
+            "BEARER abc.def.ghi": "abc.def.ghi",
+            "Bearer\tabc.def.ghi": "abc.def.ghi",
+            "Bearer   abc.def.ghi": "abc.def.ghi",
+            "  Bearer abc.def.ghi  ": "abc.def.ghi",
+            "Bearer abc.def.ghi\t\r\n": "abc.def.ghi",
+        }
+        for header, token in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(extract_token_from_header(header), token)
+    
+    def test_invalid_headers(self):
+        for header in [
+            None,
+            "",
+            "Bearer",
+            "Bearer ",
+            "Bearer \t",
+            "abc.def.ghi",
+            "Basic abc.def.ghi",
+            "Bearer abc def",
+            "Bearer abc\tdef",
+        ]:
+            with self.subTest(header=header):
+                self.assertIsNone(extract_token_from_header(header))
+
+
+
+class InvalidTokenCacheTest(unittest.TestCase):
+    """Only tokens Firebase rejects are negative-cached"""
+    
+    def _verify_with(self, side_effect):
+        return mock.patch.object(firebase_verify.auth, "verify_id_token", side_effect=side_effect)
+    
+    def test_rejected_token_is_not_verified_again(self):
+        token = make_token("rejected")
+        with self._verify_with(auth.InvalidIdTokenError("bad signature")) as verify:
+            self.assertIsNone(get_user_from_token(token))
+            self.assertIsNone(get_user_from_token(token))
+        
+        self.assertEqual(verify.call_count, 1)
+    
+    def test_transient_failure_is_not_cached(self):
+        token = make_token("transient")
+        outage = auth.CertificateFetchError("certificates unavailable", cause=None)
+        with self._verify_with(outage):
+            self.assertIsNone(get_user_from_token(token))
+        
+        with self._verify_with(lambda *args, **kwargs: {"uid": "u1", "email": "u1@iba.edu.pk"}):
+            user_data = get_user_from_token(token)
+        
+        self.assertEqual(user_data["email"], "u1@iba.edu.pk")
+
+
+if __name__ == "__main__":
+    unittest.main()
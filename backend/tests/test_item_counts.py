@@ -0,0 +1,77 @@
+"""
+Tests for the per-status found item counts shared through Redis
+"""
+
+import unittest
+from datetime import datetime
+from unittest import mock
+from app.db import SessionLocal, init_db
+from app.models import item_model
+from app.models.item_model import FoundItemDB, count_found_items_by_status, invalidate_item_counts
+from app.models.user_model import create_user_if_absent, get_user_by_email
+from app.utils import shared_cache
+from tests.helpers import FakeRedis
+
+
+class SharedStatusCountsTest(unittest.TestCase):
+    """A write racing a count refresh must not leave stale shared counts"""
+    
+    @classmethod
+    def setUpClass(cls):
+        init_db()
+        with SessionLocal() as db:
+            create_user_if_absent(db, "Counter", "counter@iba.edu.pk")
+            cls.user_id = get_user_by_email(db, "counter@iba.edu.pk").id
+    
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch.object(shared_cache, "_get_redis", lambda: self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        invalidate_item_counts()
+    
+    def _add_pending_item(self):
+        with SessionLocal() as db:
+            db.add(FoundItemDB(
+                user_id=self.user_id,
+                description="Umbrella",
+                location="Library",
+                date_found=datetime(2024, 1, 15)
+            ))
+            db.commit()
+    
+    def test_write_during_refresh_is_not_hidden(self):
+        with SessionLocal() as db:
+            before = count_found_items_by_status(db).get("pending", 0)
+        invalidate_item_counts()
+        
+        # Worker A reads the counts, then worker B writes and invalidates
+        # before A stores what it read in the shared cache
+        real_execute = SessionLocal.class_.execute
+        
+        def execute_then_write(session, *args, **kwargs):
+            result = real_execute(session, *args, **kwargs)
+            self._add_pending_item()
+            invalidate_item_counts()
+            return result
+        
+        with SessionLocal() as db, mock.patch.object(SessionLocal.class_, "execute", execute_then_write):
+            self.assertEqual(count_found_items_by_status(db).get("pending", 0), before)
+        
+        # Another worker (empty local cache) must see B's item
+        item_model._item_counts.clear()
+        with SessionLocal() as db:
+            self.assertEqual(count_found_items_by_status(db).get("pending", 0), before + 1)
+    
+    def test_shared_counts_are_reused_until_the_next_write(self):
+        with SessionLocal() as db:
+            counts = count_found_items_by_status(db)
+        
+        item_model._item_counts.clear()
+        with SessionLocal() as db, mock.patch.object(SessionLocal.class_, "execute") as execute:
+            self.assertEqual(count_found_items_by_status(db), counts)
+            execute.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Tests for model insert helpers against databases created by older releases
+"""
+
+import unittest
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.models.user_model import create_user
+from app.models.item_model import create_found_item, create_lost_item
+
+# Tables as created before created_at had a server default
+_LEGACY_SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, email VARCHAR NOT NULL UNIQUE,
+        role VARCHAR NOT NULL, created_at DATETIME
+    )""",
+    """CREATE TABLE found_items (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(id),
+        description TEXT NOT NULL, location VARCHAR NOT NULL, date_found DATETIME NOT NULL,
+        image_url VARCHAR, status VARCHAR, created_at DATETIME
+    )""",
+    """CREATE TABLE lost_items (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(id),
+        description TEXT NOT NULL, location VARCHAR NOT NULL, date_lost DATETIME NOT NULL,
+        image_url VARCHAR, status VARCHAR, created_at DATETIME
+    )""",
+]
+
+
+class LegacySchemaCreatedAtTest(unittest.TestCase):
+    """created_at is filled in even when the table has no column default"""
+    
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            for ddl in _LEGACY_SCHEMA:
+                conn.execute(text(ddl))
+        self.db = Session(engine)
+        self.addCleanup(self.db.close)
+    
+    def test_created_at_is_set_on_insert(self):
+        user = create_user(self.db, "Legacy", "legacy@iba.edu.pk")
+        found = create_found_item(self.db, user.id, "Bag", "Library", datetime(2024, 1, 15))
+        lost = create_lost_item(self.db, user.id, "Wallet", "Cafeteria", datetime(2024, 1, 14))
+        
+        for row in (user, found, lost):
+            with self.subTest(table=type(row).__tablename__):
+                self.assertIsInstance(row.created_at, datetime)
+
+
+if __name__ == "__main__":
+    unittest.main()